@@ -0,0 +1,12 @@
+from dataclasses import asdict, dataclass
+
+@dataclass(slots=True, kw_only=True)
+class DetectRecord:
+    """A detected technology together with what it was detected by."""
+
+    name: str
+    source: str | None = None
+    detected_by: str
+
+    def to_dict(self):
+        return {key: value for key, value in asdict(self).items() if value is not None}
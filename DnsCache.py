@@ -0,0 +1,22 @@
+import functools
+import socket
+
+class DnsCache:
+    """Memoizes socket.getaddrinfo so repeated requests to the same host skip DNS resolution."""
+
+    original = socket.getaddrinfo
+
+    @staticmethod
+    def install(maxsize=1024):
+        """Replaces socket.getaddrinfo process-wide; calling it again is a no-op."""
+        if socket.getaddrinfo is not DnsCache.original:
+            return
+
+        cached = functools.lru_cache(maxsize=maxsize)(DnsCache.original)
+
+        @functools.wraps(DnsCache.original)
+        def getaddrinfo(*args, **kwargs):
+            # Callers get their own list so the cached result cannot be mutated.
+            return list(cached(*args, **kwargs))
+
+        socket.getaddrinfo = getaddrinfo
@@ -0,0 +1,399 @@
+import glob
+import hashlib
+import json
+import os
+import re
+from contextlib import ExitStack
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+CACHE_DIR = os.path.join(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "web-stalker")
+INCOMPATIBLE_PATH = os.path.join(CACHE_DIR, f"hs_incompatible_{hyperscan.__version__ if hyperscan else 'none'}.json")
+
+
+def load_incompatible():
+    """Loads the expressions an earlier run found Hyperscan unable to compile."""
+    try:
+        with open(INCOMPATIBLE_PATH) as cache:
+            return set(json.load(cache))
+    except (OSError, ValueError):
+        return set()
+
+
+# Expressions Hyperscan rejects (backreferences, lookarounds, ...); they go straight to the fallback engine.
+KNOWN_HS_INCOMPATIBLE = load_incompatible() if hyperscan else set()
+
+
+class Matcher:
+    """Matches a set of named signatures against content, in a single pass when Hyperscan is available.
+
+    Signatures are regex sources (bytes or str). Case-insensitivity is a
+    single flag applied when the engine is compiled (HS_FLAG_CASELESS or
+    re.I), so scanning never lowercases the content, except
+    for the Aho-Corasick pass used by the pure re fallback.
+    """
+
+    METACHARACTERS = set(".^$*+?{}[]\\|()")
+
+    def __init__(self, signatures, caseless=True, name=None):
+        self.signatures = signatures
+        self.caseless = caseless
+        self.names = list(signatures)
+        # Identifies this matcher's cached databases across edits to its table;
+        # tables sharing their signature names need distinct names.
+        self.family = hashlib.sha1(repr(name or self.names).encode()).hexdigest()[:12]
+        self.sources = [
+            source.decode() if isinstance(source, bytes) else source
+            for source in signatures.values()
+        ]
+        # Per-signature patterns for callers that search single values such as headers.
+        self.patterns = {
+            name: re.compile(source.encode(), re.I if caseless else 0)
+            for name, source in zip(self.names, self.sources)
+        }
+        self.literals, self.expressions = self.split()
+        self.automaton = self.build_automaton() if self.literals else None
+        # Expressions Hyperscan cannot take are left here for the fallback engines.
+        self.fallbacks = dict(self.expressions)
+        self.database = self.compile() if hyperscan and self.expressions else None
+        self.regexes = self.compile_fallbacks() if self.fallbacks else {}
+
+    def split(self):
+        """Separates plain literal alternatives from the ones that need a regex engine.
+
+        Hyperscan already handles literals at full speed, so the
+        Aho-Corasick automaton is only worth building for the re fallback.
+        """
+        literals = {}
+        expressions = {}
+        for index, source in enumerate(self.sources):
+            if not ahocorasick or hyperscan:
+                expressions[index] = self.factor(source)
+                continue
+
+            rest = []
+            for alternative in self.alternatives(source):
+                if self.is_literal(alternative):
+                    key = alternative.lower() if self.caseless else alternative
+                    literals.setdefault(key, []).append(index)
+                else:
+                    rest.append(alternative)
+            if rest:
+                expressions[index] = "|".join(rest)
+        return literals, expressions
+
+    def is_literal(self, alternative):
+        return bool(alternative) and not self.METACHARACTERS & set(alternative)
+
+    def factor(self, source):
+        """Rewrites an alternation of plain literals as a prefix trie.
+
+        `wp-content|wordpress` becomes `w(?:ordpress|p-content)`, which gives
+        the engines a smaller automaton and a single leading literal to
+        prefilter on. Sources containing any regex syntax are left alone.
+        """
+        alternatives = self.alternatives(source)
+        if len(alternatives) < 2 or not all(self.is_literal(alternative) for alternative in alternatives):
+            return source
+
+        root = {}
+        for alternative in alternatives:
+            node = root
+            for char in alternative.lower() if self.caseless else alternative:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        return self.trie_pattern(root)
+
+    @staticmethod
+    def trie_pattern(node):
+        branches = [char + Matcher.trie_pattern(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+        group = f"(?:{'|'.join(branches)})"
+        return f"{group}?" if "" in node else group
+
+    @staticmethod
+    def alternatives(pattern):
+        """Splits a pattern on its top-level `|` operators."""
+        parts = []
+        depth = 0
+        start = 0
+        escaped = False
+        for position, char in enumerate(pattern):
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char in "([":
+                depth += 1
+            elif char in ")]":
+                depth -= 1
+            elif char == "|" and depth == 0:
+                parts.append(pattern[start:position])
+                start = position + 1
+        parts.append(pattern[start:])
+        return parts
+
+    def build_automaton(self):
+        """Builds one Aho-Corasick automaton over every literal alternative."""
+        automaton = ahocorasick.Automaton()
+        for literal, indices in self.literals.items():
+            # Keys are matched against latin-1 decoded bytes so offsets stay byte offsets.
+            key = literal.encode().decode("latin-1")
+            automaton.add_word(key, (len(key), indices))
+        automaton.make_automaton()
+        return automaton
+
+    def compile(self):
+        """Compiles the regex signatures into one streaming Hyperscan multi-pattern database.
+
+        Compiling costs far more than a scan, so the serialized database is
+        cached on disk under a hash of everything that goes into it, and the
+        ones earlier versions of the same table left behind are deleted.
+        Expressions Hyperscan rejects are remembered in KNOWN_HS_INCOMPATIBLE
+        and left in self.fallbacks.
+        """
+        flag = hyperscan.HS_FLAG_SOM_LEFTMOST
+        if self.caseless:
+            flag |= hyperscan.HS_FLAG_CASELESS
+        mode = hyperscan.HS_MODE_STREAM | hyperscan.HS_MODE_SOM_HORIZON_LARGE
+        supported = {
+            index: expression
+            for index, expression in self.expressions.items()
+            if expression not in KNOWN_HS_INCOMPATIBLE
+        }
+        if not supported:
+            return None
+
+        key = hashlib.sha1(repr((hyperscan.__version__, mode, flag, sorted(supported.items()))).encode()).hexdigest()
+        path = os.path.join(CACHE_DIR, f"hs_{self.family}_{key}.db")
+        database = self.load_database(path, mode)
+        if database is None:
+            try:
+                database = self.build_database(supported, mode, flag)
+            except hyperscan.error:
+                supported = self.drop_incompatible(supported, mode, flag)
+                if not supported:
+                    return None
+                database = self.build_database(supported, mode, flag)
+            self.save_database(path, database)
+            self.prune_databases(path)
+
+        for index in supported:
+            del self.fallbacks[index]
+        return database
+
+    @staticmethod
+    def build_database(expressions, mode, flag):
+        database = hyperscan.Database(mode=mode)
+        database.compile(
+            expressions=[expression.encode() for expression in expressions.values()],
+            ids=list(expressions),
+            elements=len(expressions),
+            flags=[flag] * len(expressions),
+        )
+        return database
+
+    def drop_incompatible(self, expressions, mode, flag):
+        """Finds the expressions Hyperscan rejects and records them for later runs."""
+        supported = {}
+        for index, expression in expressions.items():
+            try:
+                self.build_database({index: expression}, mode, flag)
+            except hyperscan.error:
+                KNOWN_HS_INCOMPATIBLE.add(expression)
+            else:
+                supported[index] = expression
+
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(INCOMPATIBLE_PATH, "w") as cache:
+                json.dump(sorted(KNOWN_HS_INCOMPATIBLE), cache)
+        except OSError:
+            pass
+        return supported
+
+    @staticmethod
+    def load_database(path, mode):
+        try:
+            with open(path, "rb") as cache:
+                database = hyperscan.loadb(cache.read(), mode)
+        except (OSError, hyperscan.error):
+            return None
+        # Deserialized databases come without scratch space.
+        database.scratch = hyperscan.Scratch(database)
+        return database
+
+    @staticmethod
+    def save_database(path, database):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, "wb") as cache:
+                cache.write(hyperscan.dumpb(database))
+            os.replace(temporary, path)
+        except OSError:
+            pass
+
+    def prune_databases(self, path):
+        """Deletes this matcher's other cached databases, and any left in the old unscoped naming."""
+        stale = glob.glob(os.path.join(CACHE_DIR, f"hs_{self.family}_*.db"))
+        stale += glob.glob(os.path.join(CACHE_DIR, "hs_" + "[0-9a-f]" * 40 + ".db"))
+        for cached in stale:
+            if cached != path:
+                try:
+                    os.remove(cached)
+                except OSError:
+                    pass
+
+    def compile_fallbacks(self):
+        """Compiles each regex signature Hyperscan did not take for the re fallback.
+
+        One search per signature stops at its first match, which is cheaper
+        than walking a union of them match by match in Python, and keeps a
+        signature from being shadowed by another one matching at the same
+        place.
+        """
+        flags = re.I if self.caseless else 0
+        return {index: re.compile(expression.encode(), flags) for index, expression in self.fallbacks.items()}
+
+    def stream(self):
+        """Opens an incremental scan that can be fed the content chunk by chunk."""
+        return MatchStream(self)
+
+    def locate(self, data):
+        """Returns the (start, end) byte span of the first match of every signature, in signature order."""
+        with self.stream() as stream:
+            stream.scan(data)
+        return stream.located
+
+    def search(self, content):
+        """Returns the first match of every signature found in the content, in signature order.
+
+        The content may be bytes or str; only the matched slices are decoded.
+        """
+        data = content.encode() if isinstance(content, str) else content
+        with self.stream() as stream:
+            stream.scan(data)
+        return stream.extract(data)
+
+    def search_values(self, values):
+        """Returns the first value each signature matches, scanning all values as one buffer.
+
+        Values are joined with newlines, which no signature matches across,
+        so a short list such as the response headers costs a single scan.
+        """
+        block = b"\n".join(value.encode() if isinstance(value, str) else value for value in values)
+        hits = {}
+        for name, (start, end) in self.locate(block).items():
+            line_start = block.rfind(b"\n", 0, start) + 1
+            line_end = block.find(b"\n", end)
+            hits[name] = block[line_start:line_end if line_end != -1 else None].decode(errors="replace")
+        return hits
+
+
+class MatchStream:
+    """Scans consecutive chunks of content against a Matcher's signatures.
+
+    Hyperscan keeps its own state between chunks. The Aho-Corasick and re
+    passes rescan the last OVERLAP bytes of the previous chunk
+    instead, so a match split across a chunk boundary is still found unless
+    it is longer than that window.
+    """
+
+    OVERLAP = 256
+
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.spans = {}
+        self.found = set()
+        self.offset = 0
+        self.tail = b""
+        self.exits = ExitStack()
+        self.stream = None
+        if matcher.database is not None:
+            self.stream = matcher.database.stream(match_event_handler=self.on_match)
+            self.exits.enter_context(self.stream)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.exits.close()
+        self.stream = None
+
+    def has(self, name):
+        """Whether the named signature has matched so far."""
+        return self.matcher.names.index(name) in self.spans
+
+    @property
+    def located(self):
+        """The (start, end) byte span of every signature matched so far, in signature order."""
+        return {self.matcher.names[index]: span for index, span in sorted(self.spans.items())}
+
+    def extract(self, data):
+        """Slices the matches out of the streamed content, as Matcher.search returns them.
+
+        `data` must be everything fed to scan(), joined in order.
+        """
+        return {name: data[start:end].decode(errors="replace") for name, (start, end) in self.located.items()}
+
+    def record(self, index, start, end):
+        """Keeps the leftmost match of a signature and, among those, the longest.
+
+        That is what the backtracking engines report for the prefix tries
+        factor() builds, where every optional branch is greedy.
+        """
+        span = self.spans.get(index)
+        if span is None or start < span[0] or (start == span[0] and end > span[1]):
+            self.spans[index] = (start, end)
+
+    def on_match(self, index, start, end, flags, context):
+        # Hyperscan reports every end offset of a match, so the scan keeps
+        # going to let a longer match at the same start replace a shorter one.
+        self.record(index, start, end)
+
+    def scan(self, chunk):
+        """Feeds the next chunk of content into the scan."""
+        window = self.tail + chunk
+        base = self.offset - len(self.tail)
+        if self.matcher.automaton is not None:
+            self.scan_literals(window, base)
+        if self.stream is not None:
+            self.stream.scan(chunk, match_event_handler=self.on_match)
+        if self.matcher.regexes:
+            self.scan_expressions(window, base)
+
+        self.offset += len(chunk)
+        self.tail = window[-self.OVERLAP:]
+
+    def scan_literals(self, window, base):
+        text = (window.lower() if self.matcher.caseless else window).decode("latin-1")
+        for end, (length, indices) in self.matcher.automaton.iter(text):
+            for index in indices:
+                self.record(index, base + end - length + 1, base + end + 1)
+
+    def scan_expressions(self, window, base):
+        # A hit ending in the part of the window the next scan sees again may
+        # still grow there (react -> react-dom), so it is only settled, and
+        # no longer searched for, once it ends before that part.
+        settled = len(window) - self.OVERLAP
+        for index, pattern in self.matcher.regexes.items():
+            match = index not in self.found and pattern.search(window)
+            if match:
+                self.record(index, base + match.start(), base + match.end())
+                if match.end() < settled:
+                    self.found.add(index)
@@ -1,12 +1,45 @@
-from datetime import datetime
+import atexit
+import sys
+import time
 
 class Messages:
     """Handles styled console messages."""
 
+    # When stdout is piped, messages are collected and written in one go by flush().
+    buffered = not sys.stdout.isatty()
+    buffer = []
+
+    # The timestamp only changes once a second, so it is formatted once per second.
+    second = None
+    timestamp = ""
+
+    @staticmethod
+    def now():
+        second = int(time.time())
+        if second != Messages.second:
+            Messages.second = second
+            Messages.timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second))
+        return Messages.timestamp
+
+    @staticmethod
+    def write(text):
+        """Writes raw text to stdout, or to the buffer when output is piped."""
+        if Messages.buffered:
+            Messages.buffer.append(text)
+        else:
+            sys.stdout.write(text)
+
+    @staticmethod
+    def flush():
+        """Writes out every buffered message with a single call."""
+        if Messages.buffer:
+            sys.stdout.write("".join(Messages.buffer))
+            Messages.buffer.clear()
+        sys.stdout.flush()
+
     @staticmethod
     def log(message_type, color_code, message):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[\033[1;{color_code}m{message_type}\033[0m] {timestamp} - {message}")
+        Messages.write(f"[\033[1;{color_code}m{message_type}\033[0m] {Messages.now()} - {message}\n")
 
     @staticmethod
     def info(message):
@@ -33,4 +66,8 @@ class Messages:
 |__/|__/\___/_.___/     /____/\__/\__,_/_/_/|_|\___/_/  made by corede
 
         """
-        print(f"\033[1;34m{art}\033[0m")
\ No newline at end of file
+        Messages.write(f"\033[1;34m{art}\033[0m\n")
+
+
+# Nothing buffered is lost if a scan exits early.
+atexit.register(Messages.flush)
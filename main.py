@@ -1,143 +1,301 @@
 import argparse
+import asyncio
+import aiohttp
 import requests
-import re
+from requests.adapters import HTTPAdapter
 import json
+from contextlib import contextmanager
 from Messages import Messages
+from Matcher import Matcher
+from DetectRecord import DetectRecord
+from DnsCache import DnsCache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Batch scans often hit the same hosts; resolve each one once per process.
+DnsCache.install()
+
 
 class WebsiteTechnologyScanner:
     """Scans a website to identify the technology it uses."""
 
     TECHNOLOGIES = {
-        "WordPress": re.compile(r"wp-content|wordpress", re.I),
-        "Django": re.compile(r"csrfmiddlewaretoken|django", re.I),
-        "Flask": re.compile(r"flask-session|flask", re.I),
-        "Ruby on Rails": re.compile(r"ruby|rails", re.I),
-        "Laravel": re.compile(r"laravel|php artisan", re.I),
-        "Next.js": re.compile(r"nextjs|_next", re.I),
-        "React": re.compile(r"react|react-dom", re.I),
-        "Vue.js": re.compile(r"vuejs|vue-router", re.I),
-        "CS-Cart": re.compile(r"cscart|var/(cache|compiled)", re.I),
-        "Bitrix": re.compile(r"bitrix|bxcore", re.I),
+        "WordPress": rb"wp-content|wordpress",
+        "Django": rb"csrfmiddlewaretoken|django",
+        "Flask": rb"flask-session|flask",
+        "Ruby on Rails": rb"ruby|rails",
+        "Laravel": rb"laravel|php artisan",
+        "Next.js": rb"nextjs|_next",
+        "React": rb"react|react-dom",
+        "Vue.js": rb"vuejs|vue-router",
+        "CS-Cart": rb"cscart|var/(cache|compiled)",
+        "Bitrix": rb"bitrix|bxcore",
     }
 
     WEB_SERVERS = {
-        "nginx": re.compile(r"nginx", re.I),
-        "Apache": re.compile(r"apache", re.I),
-        "LiteSpeed": re.compile(r"LiteSpeed", re.I),
+        "nginx": rb"nginx",
+        "Apache": rb"apache",
+        "LiteSpeed": rb"LiteSpeed",
     }
 
+    # Server headers usually start with the product token ("nginx/1.25"), so try a lookup first.
+    SERVER_TOKENS = {server.lower(): server for server in WEB_SERVERS}
+
     BACKEND_LANGUAGES = {
-        "PHP": re.compile(r"php", re.I),
-        "Python": re.compile(r"python", re.I),
-        "Ruby": re.compile(r"ruby", re.I),
-        "Node.js": re.compile(r"node.js|javascript", re.I),
+        "PHP": rb"php",
+        "Python": rb"python",
+        "Ruby": rb"ruby",
+        "Node.js": rb"node.js|javascript",
     }
 
+    # Each table is compiled once into a case-insensitive multi-pattern matcher.
+    TECHNOLOGY_MATCHER = Matcher(TECHNOLOGIES)
+    SERVER_MATCHER = Matcher(WEB_SERVERS)
+    BACKEND_MATCHER = Matcher(BACKEND_LANGUAGES)
+
     HEADERS = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
 
-    def __init__(self, url, verbose=True, output_json=False):
+    CHUNK_SIZE = 16384
+    MAX_CONTENT_SIZE = 2 * 1024 * 1024
+
+    # Shared across scans so repeated requests reuse pooled keep-alive connections.
+    SESSION = requests.Session()
+    SESSION.headers.update(HEADERS)
+    SESSION.mount("http://", HTTPAdapter(pool_connections=32, pool_maxsize=32))
+    SESSION.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32))
+
+    MAX_CONCURRENCY = 50
+
+    def __init__(self, url, verbose=True, output_json=False, batch=False):
         self.url = url
         self.verbose = verbose
         self.output_json = output_json
-        self.results = {}
+        # Set by run_many: --json then prints one compact line per site, tagged with its URL.
+        self.batch = batch
+        self.scalars = {}
+        self.detections = {}
+        # Match streams over the response body, kept so detection reuses their results.
+        self.frontend = None
+        self.backend = None
 
     def fetch_website(self):
         """Fetches the website content."""
         try:
             if self.verbose:
                 Messages.info(f"Fetching content from {self.url}")
-            response = requests.get(self.url, headers=self.HEADERS, timeout=10)
-            response.raise_for_status()
-            server = response.headers.get("Server", "Unknown")
-            if self.verbose:
-                Messages.success(f"Web Server: {server}")
-            self.results["Web Server"] = server
-            self.detect_web_server(server)
-            return response.text, response.headers
+            with self.SESSION.get(self.url, timeout=10, stream=True) as response:
+                response.raise_for_status()
+                self.read_server(response.headers)
+                return self.read_content(response), response.headers
         except requests.RequestException as e:
             Messages.error(f"Connection error: {e}")
             return None, None
 
+    async def fetch_website_async(self, session):
+        """Fetches the website content without blocking other scans."""
+        try:
+            if self.verbose:
+                Messages.info(f"Fetching content from {self.url}")
+            async with session.get(self.url) as response:
+                response.raise_for_status()
+                self.read_server(response.headers)
+                return await self.read_content_async(response), response.headers
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            Messages.error(f"Connection error: {e}")
+            return None, None
+
+    def read_server(self, headers):
+        """Records the web server announced in the response headers."""
+        server = headers.get("Server", "Unknown")
+        if self.verbose:
+            Messages.success(f"Web Server: {server}")
+        self.scalars["Web Server"] = server
+        self.detect_web_server(server)
+
+    def read_content(self, response):
+        """Reads the body until the rest of it cannot change the detections or the size cap is reached."""
+        chunks = []
+        with self.body_streams():
+            for chunk in response.iter_content(self.CHUNK_SIZE):
+                if not self.scan_chunk(chunks, chunk):
+                    break
+        return b"".join(chunks)
+
+    def decided(self):
+        """Whether the rest of the body can no longer change the detections.
+
+        identify_technology reports the last TECHNOLOGIES entry that matched
+        and identify_backend_language the first BACKEND_LANGUAGES entry found
+        in the HTML, so only hits on those two entries settle the scan early.
+        """
+        return self.frontend.has(next(reversed(self.TECHNOLOGIES))) and self.backend.has(next(iter(self.BACKEND_LANGUAGES)))
+
+    async def read_content_async(self, response):
+        """Asynchronous counterpart of read_content for aiohttp responses."""
+        chunks = []
+        with self.body_streams():
+            async for chunk in response.content.iter_chunked(self.CHUNK_SIZE):
+                if not self.scan_chunk(chunks, chunk):
+                    break
+        return b"".join(chunks)
+
+    @contextmanager
+    def body_streams(self):
+        """Opens the match streams a response body is scanned with as it downloads."""
+        with self.TECHNOLOGY_MATCHER.stream() as self.frontend, self.BACKEND_MATCHER.stream() as self.backend:
+            yield
+
+    def scan_chunk(self, chunks, chunk):
+        """Buffers and scans the next body chunk; returns whether more of the body is needed.
+
+        Shared by read_content and read_content_async, which only differ in
+        how they iterate over the response.
+        """
+        chunks.append(chunk)
+        self.frontend.scan(chunk)
+        self.backend.scan(chunk)
+        return self.frontend.offset < self.MAX_CONTENT_SIZE and not self.decided()
+
     def detect_web_server(self, server_info):
         """Detects the web server from the response headers."""
-        Messages.info("Analyzing web server information.")
-        for server, pattern in self.WEB_SERVERS.items():
-            if pattern.search(server_info):
+        if self.verbose:
+            Messages.info("Analyzing web server information.")
+        product = server_info.split("/", 1)[0].strip().lower()
+        server = self.SERVER_TOKENS.get(product)
+        if server is None:
+            server = next(iter(self.SERVER_MATCHER.search(server_info)), None)
+        if server:
+            if self.verbose:
                 Messages.success(f"Detected web server: {server}")
-                self.results["Web Server"] = server
-                return
+            self.scalars["Web Server"] = server
+            return
         Messages.warn("No known web server detected.")
 
     def identify_technology(self, html):
         """Identifies the technology based on HTML content."""
-        Messages.info("Analyzing website content for technology patterns.")
-        for tech, pattern in self.TECHNOLOGIES.items():
-            match = pattern.search(html)
-            if match:
-                Messages.success(f"Frontend: {tech} (Detected by: {match.group()})")
-                self.results["Frontend"] = {
-                    "name": tech,
-                    "detected_by": match.group()
-                }
+        if self.verbose:
+            Messages.info("Analyzing website content for technology patterns.")
+        for tech, match in self.frontend.extract(html).items():
+            if self.verbose:
+                Messages.success(f"Frontend: {tech} (Detected by: {match})")
+            self.detections["Frontend"] = DetectRecord(name=tech, detected_by=match)
 
     def identify_backend_language(self, html, headers):
         """Identifies the backend language from the HTML content and headers."""
-        Messages.info("Analyzing website content and headers for backend language patterns.")
-        for lang, pattern in self.BACKEND_LANGUAGES.items():
-            match_html = pattern.search(html)
-            match_header = any(pattern.search(value) for value in headers.values())
+        if self.verbose:
+            Messages.info("Analyzing website content and headers for backend language patterns.")
+        html_matches = self.backend.extract(html)
+        header_matches = self.BACKEND_MATCHER.search_values(headers.values())
+        for lang in self.BACKEND_LANGUAGES:
+            match_html = html_matches.get(lang)
+            match_header = header_matches.get(lang)
 
             if match_html or match_header:
                 source = "HTML" if match_html else "Headers"
-                match_value = match_html.group() if match_html else next(
-                    (value for value in headers.values() if pattern.search(value)), "Unknown")
-                Messages.success(f"Language: {lang} (Detected in {source} by: {match_value})")
-                self.results["Backend Language"] = {
-                    "name": lang,
-                    "source": source,
-                    "detected_by": match_value
-                }
+                match_value = match_html or match_header
+                if self.verbose:
+                    Messages.success(f"Language: {lang} (Detected in {source} by: {match_value})")
+                self.detections["Backend Language"] = DetectRecord(name=lang, source=source, detected_by=match_value)
                 return
         Messages.warn("No backend language detected.")
 
     def run(self):
         """Executes the scanning process."""
-        Messages.banner()
-        Messages.info(f"Starting scan for website: {self.url}")
+        if self.verbose:
+            Messages.banner()
+            Messages.info(f"Starting scan for website: {self.url}")
         html_content, headers = self.fetch_website()
+        self.report(html_content, headers)
+        Messages.flush()
+
+    async def run_async(self, session, semaphore):
+        """Executes the scanning process on a shared aiohttp session."""
+        async with semaphore:
+            if self.verbose:
+                Messages.info(f"Starting scan for website: {self.url}")
+            html_content, headers = await self.fetch_website_async(session)
+        self.report(html_content, headers)
+        Messages.flush()
+
+    @classmethod
+    def run_many(cls, urls, verbose=True, output_json=False):
+        """Scans several websites concurrently and returns their scanners."""
+        if verbose:
+            Messages.banner()
+        return asyncio.run(cls.scan_many(urls, verbose, output_json))
 
+    @classmethod
+    async def scan_many(cls, urls, verbose, output_json):
+        scanners = [cls(url, verbose=verbose, output_json=output_json, batch=True) for url in urls]
+        semaphore = asyncio.Semaphore(cls.MAX_CONCURRENCY)
+        connector = aiohttp.TCPConnector(limit=100, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(sock_connect=10, sock_read=10)
+        async with aiohttp.ClientSession(connector=connector, headers=cls.HEADERS, timeout=timeout) as session:
+            await asyncio.gather(*(scanner.run_async(session, semaphore) for scanner in scanners))
+        return scanners
+
+    @property
+    def results(self):
+        """All scan results as plain data, scalar fields first."""
+        return {**self.scalars, **{key: record.to_dict() for key, record in self.detections.items()}}
+
+    @staticmethod
+    def dumps(results, indent=True):
+        """Serializes the results as JSON, indented or on one line, with the orjson C encoder when available."""
+        if orjson is not None:
+            return orjson.dumps(results, option=orjson.OPT_INDENT_2 if indent else 0).decode()
+        return json.dumps(results, indent=4 if indent else None)
+
+    def analyze(self, html_content, headers):
+        """Runs the detections over the fetched content."""
+        self.identify_technology(html_content)
+        self.identify_backend_language(html_content, headers)
+
+    def report(self, html_content, headers):
+        """Analyzes the fetched content and prints the scan results."""
         if not html_content:
             Messages.warn("Failed to retrieve website content.")
             return
 
-        self.identify_technology(html_content)
-        self.identify_backend_language(html_content, headers)
+        self.analyze(html_content, headers)
 
-        if self.results:
-            Messages.info("Scan results:")
-            for key, value in self.results.items():
-                if isinstance(value, dict):
-                    Messages.success(f"{key}: {value['name']} (Detected by: {value['detected_by']})")
-                else:
-                    Messages.success(f"{key}: {value}")
+        if self.scalars or self.detections:
+            # Batch scans report in the order they finish, so each block names its site.
+            Messages.info(f"Scan results for {self.url}:")
+            for key, value in self.scalars.items():
+                Messages.success(f"{key}: {value}")
+            for key, record in self.detections.items():
+                Messages.success(f"{key}: {record.name} (Detected by: {record.detected_by})")
         else:
             Messages.warn("No technologies detected.")
 
         if self.output_json:
-            print(json.dumps(self.results, indent=4))
-        Messages.info("Scan completed.")
+            if self.batch:
+                # Batch reports arrive in completion order; one line each keeps them readable as JSON Lines.
+                Messages.write(self.dumps({"URL": self.url, **self.results}, indent=False) + "\n")
+            else:
+                Messages.write(self.dumps(self.results) + "\n")
+        if self.verbose:
+            Messages.info("Scan completed.")
 
 def main():
     parser = argparse.ArgumentParser(description="Website Technology Scanner")
-    parser.add_argument("url", help="URL of the website to scan")
+    parser.add_argument("urls", nargs="+", metavar="url", help="URL of the website to scan (several are scanned concurrently)")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose output")
     parser.add_argument("--json", action="store_true", help="Output results in JSON format")
 
     args = parser.parse_args()
 
-    scanner = WebsiteTechnologyScanner(url=args.url, verbose=args.verbose or True, output_json=args.json)
+    if len(args.urls) > 1:
+        WebsiteTechnologyScanner.run_many(args.urls, verbose=args.verbose, output_json=args.json)
+        return
+
+    scanner = WebsiteTechnologyScanner(url=args.urls[0], verbose=args.verbose, output_json=args.json)
     scanner.run()
 
 if __name__ == "__main__":
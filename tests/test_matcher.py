@@ -0,0 +1,162 @@
+import itertools
+import os
+import random
+import re
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Matcher as matcher_module
+from Matcher import Matcher, MatchStream
+
+OPTIONAL_ENGINES = [name for name in ("hyperscan", "ahocorasick") if getattr(matcher_module, name) is not None]
+
+# Every combination of the installed optional engines, each also forced to None.
+ENGINE_COMBINATIONS = [
+    dict(zip(OPTIONAL_ENGINES, enabled))
+    for enabled in itertools.product((True, False), repeat=len(OPTIONAL_ENGINES))
+]
+
+TABLES = {}
+
+
+def setUpModule():
+    # Keep compiled databases and the incompatible-expression list out of the user's cache.
+    cache = tempfile.mkdtemp()
+    patcher = mock.patch.multiple(
+        matcher_module,
+        CACHE_DIR=cache,
+        INCOMPATIBLE_PATH=os.path.join(cache, "hs_incompatible.json"),
+    )
+    patcher.start()
+    unittest.addModuleCleanup(patcher.stop)
+
+    try:
+        import main
+        import v2
+    except ImportError:
+        return
+    stable, beta = main.WebsiteTechnologyScanner, v2.WebsiteTechnologyScanner
+    TABLES.update(
+        technologies=stable.TECHNOLOGIES,
+        web_servers=stable.WEB_SERVERS,
+        backend_languages=stable.BACKEND_LANGUAGES,
+        technology_signatures=beta.TECHNOLOGY_SIGNATURES,
+        backend_signatures=beta.BACKEND_SIGNATURES,
+    )
+
+
+def engines(enabled):
+    """Patches the optional engine modules that are switched off to None."""
+    return mock.patch.dict(vars(matcher_module), {name: None for name, on in enabled.items() if not on})
+
+
+def locate(matcher, data, size):
+    """Streams the content in chunks of the given size and returns the spans found."""
+    with matcher.stream() as stream:
+        for position in range(0, len(data), size):
+            stream.scan(data[position:position + size])
+    return stream.located
+
+
+def reference(signatures, data):
+    """The leftmost match of every signature and, at that start, the longest one, using plain re."""
+    spans = {}
+    for name, source in signatures.items():
+        pattern = re.compile(source, re.I)
+        match = pattern.search(data)
+        if match:
+            start = match.start()
+            limit = min(len(data), start + MatchStream.OVERLAP)
+            spans[name] = (start, max(end for end in range(start, limit + 1) if pattern.fullmatch(data, start, end)))
+    return spans
+
+
+TOKENS = [
+    b"wp-content", b"/wp-content/", b"WordPress", b"react", b"React-DOM", b"react-dom", b"_next", b"__NEXT_DATA__",
+    b"nextjs", b"var/cache", b"var/compiled", b"php", b"PHP artisan", b"phpython", b"python", b"ruby", b"rails",
+    b"node.js", b"node-js", b"javascript", b"bitrix", b"bxcore", b"laravel", b"flask-session", b"django",
+    b'name="csrfmiddlewaretoken"', b"csrfmiddlewaretoken", b"/static/js/main.ab12.js", b"/js/app.js",
+    b"vue.runtime.min.js", b"data-turbolinks-track", b"wsgi", b"app.rb", b"express", b"nginx/1.25", b"LiteSpeed",
+]
+
+FILLER = b"<div class='x'> lorem ipsum \xc3\xa9 </div>\n"
+
+
+def haystack(rng, length):
+    """Builds a page of filler with scanner tokens scattered through it."""
+    parts = []
+    size = 0
+    while size < length:
+        part = rng.choice(TOKENS) if rng.random() < 0.3 else FILLER[:rng.randint(1, len(FILLER))]
+        parts.append(part)
+        size += len(part)
+    return b"".join(parts)
+
+
+class MatcherEquivalenceTest(unittest.TestCase):
+    """Every engine combination must report the same spans as plain re."""
+
+    CHUNK_SIZES = [1, 7, 64, 300, 4096, 1 << 20]
+
+    def assertEngines(self, signatures, data, chunk_sizes=CHUNK_SIZES):
+        expected = reference(signatures, data)
+        for enabled in ENGINE_COMBINATIONS:
+            with engines(enabled):
+                matcher = Matcher(signatures)
+                for size in chunk_sizes:
+                    with self.subTest(engines=enabled, chunk_size=size):
+                        self.assertEqual(locate(matcher, data, size), expected)
+
+    def test_scanner_tables(self):
+        if not TABLES:
+            self.skipTest("the scanner modules need requests and aiohttp")
+        rng = random.Random(0)
+        pages = [haystack(rng, rng.randint(50, 3000)) for _ in range(20)]
+        for name, table in TABLES.items():
+            for page in pages:
+                with self.subTest(table=name):
+                    self.assertEngines(table, page)
+
+    def test_overlapping_signatures(self):
+        self.assertEngines({"A": rb"foo(bar)?", "B": rb"bar\d"}, b"foobar1")
+        self.assertEngines({"A": rb"foobar", "B": rb"bar"}, b"foobar bar")
+        self.assertEngines({"PHP": rb"php", "Python": rb"python"}, b"phpython ... python")
+
+    def test_same_start(self):
+        self.assertEngines({"A": rb"react", "B": rb"react|react-dom", "C": rb"react-dom"}, b"x react-dom y")
+
+    def test_match_straddling_chunk_boundary(self):
+        data = b"y" * (16384 - 5) + b"react-dom php"
+        self.assertEngines({"React": rb"react|react-dom", "PHP": rb"php"}, data, chunk_sizes=[16384, 4095, 1])
+
+    def test_backreference(self):
+        self.assertEngines({"Repeat": rb"(ab)\1", "Word": rb"abab|x"}, b"zz abab x")
+
+    def test_caseless(self):
+        self.assertEngines({"nginx": rb"nginx", "LiteSpeed": rb"LiteSpeed"}, b"Server: NGINX litespeed")
+
+    def test_no_match(self):
+        self.assertEngines({"A": rb"wordpress", "B": rb"var/(cache|compiled)"}, FILLER * 100)
+
+
+class MatcherSearchTest(unittest.TestCase):
+    def test_search_decodes_matches(self):
+        for enabled in ENGINE_COMBINATIONS:
+            with self.subTest(engines=enabled), engines(enabled):
+                matcher = Matcher({"WordPress": rb"wp-content|wordpress", "PHP": rb"php"})
+                self.assertEqual(matcher.search("<link href='/WP-Content/x.css'>"), {"WordPress": "WP-Content"})
+
+    def test_search_values_returns_whole_value(self):
+        for enabled in ENGINE_COMBINATIONS:
+            with self.subTest(engines=enabled), engines(enabled):
+                matcher = Matcher({"PHP": rb"php", "Python": rb"python"})
+                values = ["text/html", "PHP/8.2", "gunicorn (Python)"]
+                self.assertEqual(matcher.search_values(values), {"PHP": "PHP/8.2", "Python": "gunicorn (Python)"})
+
+
+if __name__ == "__main__":
+    unittest.main()
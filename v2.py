@@ -1,143 +1,90 @@
 import argparse
-import requests
-import re
-import json
+import main as stable
 from Messages import Messages
+from Matcher import Matcher
+from DetectRecord import DetectRecord
 
-class WebsiteTechnologyScanner:
-    """Scans a website to identify the technology it uses."""
-
-    TECHNOLOGIES = {
-        "WordPress": re.compile(r"wp-content|wordpress", re.I),
-        "Django": re.compile(r"csrfmiddlewaretoken|django", re.I),
-        "Flask": re.compile(r"flask-session|flask", re.I),
-        "Ruby on Rails": re.compile(r"ruby|rails", re.I),
-        "Laravel": re.compile(r"laravel|php artisan", re.I),
-        "Next.js": re.compile(r"nextjs|_next", re.I),
-        "React": re.compile(r"react|react-dom", re.I),
-        "Vue.js": re.compile(r"vuejs|vue-router", re.I),
-        "CS-Cart": re.compile(r"cscart|var/(cache|compiled)", re.I),
-        "Bitrix": re.compile(r"bitrix|bxcore", re.I),
-    }
 
-    WEB_SERVERS = {
-        "nginx": re.compile(r"nginx", re.I),
-        "Apache": re.compile(r"apache", re.I),
-        "LiteSpeed": re.compile(r"LiteSpeed", re.I),
-    }
+class WebsiteTechnologyScanner(stable.WebsiteTechnologyScanner):
+    """Scans a website to identify the technology it uses, accepting a hit only in a plausible context.
 
-    BACKEND_LANGUAGES = {
-        "PHP": re.compile(r"php", re.I),
-        "Python": re.compile(r"python", re.I),
-        "Ruby": re.compile(r"ruby", re.I),
-        "Node.js": re.compile(r"node.js|javascript", re.I),
+    Fetching, streaming and reporting are inherited from the stable scanner in main.py.
+    """
+
+    TECHNOLOGY_SIGNATURES = {
+        "WordPress": rb"/wp-content/",
+        "Django": rb"name=['\"]csrfmiddlewaretoken['\"]",
+        "Flask": rb"flask",
+        "React": rb"/static/js/main\.\w+\.js",  # React's bundled JS
+        "Vue.js": rb"vue.runtime.min.js",
+        "Laravel": rb"/js/app.js",
+        "Ruby on Rails": rb"data-turbolinks-track",
+        "Next.js": rb"__NEXT_DATA__",
     }
 
-    HEADERS = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+    BACKEND_SIGNATURES = {
+        "PHP": rb"\.php",
+        "Python": rb"(wsgi|django|flask)",
+        "Ruby": rb"(rails|\.rb)",
+        "Node.js": rb"express|node.js",
     }
 
-    def __init__(self, url, verbose=True, output_json=False):
-        self.url = url
-        self.verbose = verbose
-        self.output_json = output_json
-        self.results = {}
+    TECHNOLOGY_SIGNATURE_MATCHER = Matcher(TECHNOLOGY_SIGNATURES)
+    # Named because BACKEND_LANGUAGES uses the same signature names.
+    BACKEND_SIGNATURE_MATCHER = Matcher(BACKEND_SIGNATURES, name="backend_signatures")
 
-    def fetch_website(self):
-        """Fetches the website content."""
-        try:
-            if self.verbose:
-                Messages.info(f"Fetching content from {self.url}")
-            response = requests.get(self.url, headers=self.HEADERS, timeout=10)
-            response.raise_for_status()
-            server = response.headers.get("Server", "Unknown")
-            if self.verbose:
-                Messages.success(f"Web Server: {server}")
-            self.results["Web Server"] = server
-            self.detect_web_server(server)
-            return response.text, response.headers
-        except requests.RequestException as e:
-            Messages.error(f"Connection error: {e}")
-            return None, None
-    
-    def detect_technologies(html):
-        tech_patterns = {
-            "WordPress": r"/wp-content/",
-            "Django": r"name=['\"]csrfmiddlewaretoken['\"]",
-            "Flask": r"flask",
-            "React": r"/static/js/main\.\w+\.js",  # React's bundled JS
-            "Vue.js": r"vue.runtime.min.js",
-            "Laravel": r"/js/app.js",
-            "Ruby on Rails": r"data-turbolinks-track",
-            "Next.js": r"__NEXT_DATA__",
-        }
+    def decided(self):
+        """Whether the rest of the body can no longer change the detections.
+
+        A frontend hit only counts once is_valid_context accepts it, and any
+        later match may be the first one it accepts, so v2 reads up to the size cap.
+        """
+        return False
 
-        detected_tech = []
-        for tech, pattern in tech_patterns.items():
-            if re.search(pattern, html, re.I):
-                detected_tech.append(tech)
+    def detect_technologies(self, html):
+        """Detects every technology whose signature appears in the HTML content."""
+        detected_tech = list(self.TECHNOLOGY_SIGNATURE_MATCHER.search(html))
 
         if detected_tech:
-            Messages.success(f"Detected technologies: {', '.join(detected_tech)}")
+            if self.verbose:
+                Messages.success(f"Detected technologies: {', '.join(detected_tech)}")
         else:
-            Messages.warning("No technologies detected.")
+            Messages.warn("No technologies detected.")
         return detected_tech
 
-
-    def detect_backend(headers, html):
+    def detect_backend(self, headers, html):
         """Detects the backend language used."""
-        backend_patterns = {
-            "PHP": r"\.php",
-            "Python": r"(wsgi|django|flask)",
-            "Ruby": r"(rails|\.rb)",
-            "Node.js": r"express|node.js",
-        }
-
-        detected_backend = None
-
         # Check headers for backend clues
-        for backend, pattern in backend_patterns.items():
-            if any(re.search(pattern, value, re.I) for value in headers.values()):
-                detected_backend = backend
-                break
+        detected_backend = next(iter(self.BACKEND_SIGNATURE_MATCHER.search_values(headers.values())), None)
 
         # Check HTML content for backend clues
         if not detected_backend:
-            for backend, pattern in backend_patterns.items():
-                if re.search(pattern, html, re.I):
-                    detected_backend = backend
-                    break
+            detected_backend = next(iter(self.BACKEND_SIGNATURE_MATCHER.search(html)), None)
 
         if detected_backend:
-            Messages.success(f"Detected backend language: {detected_backend}")
+            if self.verbose:
+                Messages.success(f"Detected backend language: {detected_backend}")
         else:
-            Messages.warning("No backend language detected.")
+            Messages.warn("No backend language detected.")
         return detected_backend
 
-    
-    def detect_web_server(self, server_info):
-        """Detects the web server from the response headers."""
-        Messages.info("Analyzing web server information.")
-        for server, pattern in self.WEB_SERVERS.items():
-            if pattern.search(server_info):
-                Messages.success(f"Detected web server: {server}")
-                self.results["Web Server"] = server
-                return
-        Messages.warn("No known web server detected.")
-
     def identify_technology_with_context(self, html):
         """Enhanced technology detection with context."""
-        Messages.info("Analyzing website content for technologies.")
+        if self.verbose:
+            Messages.info("Analyzing website content for technologies.")
         
-        for tech, pattern in self.TECHNOLOGIES.items():
-            matches = pattern.findall(html)
-            
+        candidates = self.frontend.located
+        for tech, pattern in self.TECHNOLOGY_MATCHER.patterns.items():
+            if tech not in candidates:
+                continue
             # Validate matches by checking for meaningful context
-            for match in matches:
-                context = html[max(0, html.find(match) - 50):html.find(match) + 50]
+            start, _ = candidates[tech]
+            for match in pattern.finditer(html, start):
+                context = html[max(0, match.start() - 50):match.end() + 50].decode(errors="replace")
                 if self.is_valid_context(context, tech):
-                    Messages.success(f"Detected Frontend: {tech} (Context: {context.strip()})")
-                    self.results["Frontend"] = {"name": tech, "detected_by": match}
+                    if self.verbose:
+                        Messages.success(f"Detected Frontend: {tech} (Context: {context.strip()})")
+                    self.detections["Frontend"] = DetectRecord(name=tech, detected_by=match.group().decode(errors="replace"))
                     return
 
         Messages.warn("No frontend technologies detected.")
@@ -155,74 +102,54 @@ class WebsiteTechnologyScanner:
         
         return any(keyword in context for keyword in related_keywords.get(tech, []))
 
-
     def identify_backend_language_with_context(self, html, headers):
         """Enhanced backend language detection with context."""
-        Messages.info("Analyzing website headers and content for backend language.")
+        if self.verbose:
+            Messages.info("Analyzing website headers and content for backend language.")
         
-        for lang, pattern in self.BACKEND_LANGUAGES.items():
-            match_html = pattern.search(html)
-            match_header = any(pattern.search(value) for value in headers.values())
+        header_matches = self.BACKEND_MATCHER.search_values(headers.values())
+        html_matches = self.backend.located
+        for lang in self.BACKEND_LANGUAGES:
+            match_html = html_matches.get(lang)
             
             # Validate matches with context
             if match_html:
-                context = html[max(0, match_html.start() - 50):match_html.end() + 50]
+                start, end = match_html
+                context = html[max(0, start - 50):end + 50].decode(errors="replace")
                 if self.is_valid_context(context, lang):
-                    Messages.success(f"Detected Backend Language: {lang} (Context: {context.strip()})")
-                    self.results["Backend Language"] = {"name": lang, "detected_by": context.strip()}
+                    if self.verbose:
+                        Messages.success(f"Detected Backend Language: {lang} (Context: {context.strip()})")
+                    self.detections["Backend Language"] = DetectRecord(name=lang, detected_by=context.strip())
                     return
             
-            if match_header:
-                header_value = next(value for key, value in headers.items() if pattern.search(value))
-                Messages.success(f"Detected Backend Language: {lang} (Header: {header_value})")
-                self.results["Backend Language"] = {"name": lang, "detected_by": "Headers"}
+            header_value = header_matches.get(lang)
+            if header_value:
+                if self.verbose:
+                    Messages.success(f"Detected Backend Language: {lang} (Header: {header_value})")
+                self.detections["Backend Language"] = DetectRecord(name=lang, detected_by="Headers")
                 return
 
         Messages.warn("No backend language detected.")
 
-
-    def run(self):
-        """Executes the scanning process."""
-        Messages.banner()
-        Messages.info(f"Starting scan for website: {self.url}")
-        
-        # Fetch website content and headers
-        html_content, headers = self.fetch_website()
-
-        if not html_content:
-            Messages.warn("Failed to retrieve website content.")
-            return
-
-        # Identify technologies and backend language with enhanced checks
+    def analyze(self, html_content, headers):
+        """Runs the context-checked detections over the fetched content."""
         self.identify_technology_with_context(html_content)
         self.identify_backend_language_with_context(html_content, headers)
 
-        # Display results
-        if self.results:
-            Messages.info("Scan results:")
-            for key, value in self.results.items():
-                if isinstance(value, dict):
-                    Messages.success(f"{key}: {value['name']} (Detected by: {value['detected_by']})")
-                else:
-                    Messages.success(f"{key}: {value}")
-        else:
-            Messages.warn("No technologies detected.")
-
-        # Output results in JSON format if required
-        if self.output_json:
-            print(json.dumps(self.results, indent=4))
-        Messages.info("Scan completed.")
-
 
 def main():
     parser = argparse.ArgumentParser(description="Website Technology Scanner")
-    parser.add_argument("url", help="URL of the website to scan")
+    parser.add_argument("urls", nargs="+", metavar="url", help="URL of the website to scan (several are scanned concurrently)")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose output")
     parser.add_argument("--json", action="store_true", help="Output results in JSON format")
 
     args = parser.parse_args()
 
-    scanner = WebsiteTechnologyScanner(url=args.url, verbose=args.verbose or True, output_json=args.json)
+    if len(args.urls) > 1:
+        WebsiteTechnologyScanner.run_many(args.urls, verbose=args.verbose, output_json=args.json)
+        return
+
+    scanner = WebsiteTechnologyScanner(url=args.urls[0], verbose=args.verbose, output_json=args.json)
     scanner.run()
 
 if __name__ == "__main__":